@@ -4,15 +4,20 @@ Exposes RAG agent functionality via HTTP API with tool registration
 """
 
 import os
-import json
+import orjson
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+import multiprocessing
+from typing import Optional, List, Dict, Any
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
-from tools.chromadb_tool import ChromaTool, load_sample_documents
-from rag_agent import RAGAgent
+from tools.chromadb_tool import (
+    CHROMA_SERVER_URL, ChromaTool, count_documents, get_chroma_tool, load_sample_documents
+)
+from rag_agent import RAGAgent, CONTEXT_CACHE_SIZE
 
 
 # Configure logging
@@ -31,6 +36,8 @@ class QueryRequest(BaseModel):
     query: str
     use_context: bool = True
     n_results: int = 3
+    where: Optional[dict] = None
+    use_cache: bool = True
 
 
 class QueryResponse(BaseModel):
@@ -39,6 +46,19 @@ class QueryResponse(BaseModel):
     retrieved_documents: list
     context_used: bool
     model: str
+    cached: bool = False
+
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    use_context: bool = True
+    n_results: int = 3
+    where: Optional[dict] = None
+    use_cache: bool = True
+
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
 
 
 class DocumentsRequest(BaseModel):
@@ -50,6 +70,20 @@ class DocumentsRequest(BaseModel):
 class SearchRequest(BaseModel):
     query: str
     n_results: int = 3
+    where: Optional[dict] = None
+
+
+class SearchResults(BaseModel):
+    documents: List[str]
+    ids: List[str]
+    distances: List[float]
+    metadatas: List[Optional[dict]]
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: SearchResults
+    count: int
 
 
 # Global agent and vector store instances
@@ -57,6 +91,24 @@ agent: Optional[RAGAgent] = None
 vector_store: Optional[ChromaTool] = None
 
 
+def get_worker_count() -> int:
+    """Number of uvicorn worker processes serving the API"""
+    return int(os.environ.get("WEB_CONCURRENCY", 1))
+
+
+def configure_performance_environment() -> None:
+    """Set tokenizer and thread settings before the embedding model is loaded"""
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+    
+    try:
+        import torch
+    except ImportError:
+        return
+    
+    # Split the cores between worker processes instead of oversubscribing them
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // get_worker_count()))
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize agent and vector store on startup"""
@@ -64,17 +116,36 @@ async def startup_event():
     
     logger.info("Initializing RAG Agent and Vector Store...")
     
-    vector_store = ChromaTool(persist_dir="./vector_store")
-    agent = RAGAgent(vector_store_path="./vector_store")
+    configure_performance_environment()
+    vector_store = get_chroma_tool(persist_dir="./vector_store")
+    # The context cache is per process and a document change only clears it in the
+    # worker that handled the request, so it is only safe with a single worker
+    agent = RAGAgent(
+        vector_store=vector_store,
+        context_cache_size=CONTEXT_CACHE_SIZE if get_worker_count() == 1 else 0
+    )
+    
+    # Sample documents are loaded once by main() before workers start, not per worker
+    if vector_store.collection.count() == 0:
+        logger.warning("Vector store is empty. Start the server with 'python main.py' to load sample documents.")
     
-    # Load sample documents if collection is empty
-    if vector_store.get_collection_stats()["document_count"] == 0:
-        logger.info("Loading sample documents...")
-        load_sample_documents(vector_store)
+    # Pay model load and first-inference costs now rather than on the first query
+    logger.info("Warming up embedding model and Ollama...")
+    try:
+        await agent.warmup()
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {str(e)}")
     
     logger.info("RAG Agent initialized successfully!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release resources held by the agent"""
+    if agent is not None:
+        await agent.aclose()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -84,6 +155,8 @@ async def root():
         "description": "Local agentic RAG system using Model Context Protocol",
         "endpoints": {
             "query": "/query",
+            "query_batch": "/query/batch",
+            "query_stream": "/query/stream",
             "search": "/search",
             "add_documents": "/documents",
             "stats": "/stats",
@@ -98,9 +171,10 @@ async def health_check():
     if agent is None or vector_store is None:
         raise HTTPException(status_code=503, detail="Service not initialized")
     
+    # Polled often, so only count documents; cache statistics are served by /stats
     return {
         "status": "healthy",
-        "vector_store_documents": vector_store.get_collection_stats()["document_count"]
+        "vector_store_documents": await asyncio.to_thread(vector_store.collection.count)
     }
 
 
@@ -119,10 +193,12 @@ async def query_agent(request: QueryRequest):
         raise HTTPException(status_code=503, detail="Agent not initialized")
     
     try:
-        result = agent.get_response(
+        result = await agent.get_response(
             query=request.query,
             use_context=request.use_context,
-            n_results=request.n_results
+            n_results=request.n_results,
+            where=request.where,
+            use_cache=request.use_cache
         )
         return QueryResponse(**result)
     except Exception as e:
@@ -130,7 +206,66 @@ async def query_agent(request: QueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/search")
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_agent_batch(request: BatchQueryRequest):
+    """
+    Query the RAG agent with several questions at once
+    
+    Args:
+        request: BatchQueryRequest with queries, use_context, and n_results
+        
+    Returns:
+        BatchQueryResponse with one QueryResponse per query, in order
+    """
+    if agent is None:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+    
+    try:
+        results = await agent.get_responses_batch(
+            queries=request.queries,
+            use_context=request.use_context,
+            n_results=request.n_results,
+            where=request.where,
+            use_cache=request.use_cache
+        )
+        return BatchQueryResponse(results=[QueryResponse(**result) for result in results])
+    except Exception as e:
+        logger.error(f"Error processing batch query: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/query/stream")
+async def query_agent_stream(request: QueryRequest):
+    """
+    Query the RAG agent and stream the answer as Server-Sent Events
+    
+    Args:
+        request: QueryRequest with query, use_context, and n_results
+        
+    Returns:
+        StreamingResponse emitting one JSON event per "data:" frame
+    """
+    if agent is None:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+    
+    async def event_stream():
+        try:
+            async for event in agent.stream_response(
+                query=request.query,
+                use_context=request.use_context,
+                n_results=request.n_results,
+                where=request.where,
+                use_cache=request.use_cache
+            ):
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield b"data: " + orjson.dumps({"type": "error", "detail": str(e)}) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.post("/search", response_model=SearchResponse)
 async def search_documents(request: SearchRequest):
     """
     Search for documents in the vector store
@@ -145,7 +280,9 @@ async def search_documents(request: SearchRequest):
         raise HTTPException(status_code=503, detail="Vector store not initialized")
     
     try:
-        results = vector_store.search(request.query, request.n_results)
+        results = await asyncio.to_thread(
+            vector_store.search, request.query, request.n_results, request.where
+        )
         return {
             "query": request.query,
             "results": results,
@@ -171,15 +308,14 @@ async def add_documents(request: DocumentsRequest):
         raise HTTPException(status_code=503, detail="Vector store not initialized")
     
     try:
-        vector_store.add_documents(
-            documents=request.documents,
-            ids=request.ids,
-            metadata=request.metadata
+        # Embedding and writing are CPU and disk bound, keep them off the event loop
+        await asyncio.to_thread(
+            vector_store.add_documents, request.documents, request.ids, request.metadata
         )
         return {
             "status": "success",
             "documents_added": len(request.documents),
-            "total_documents": vector_store.get_collection_stats()["document_count"]
+            "total_documents": await asyncio.to_thread(vector_store.collection.count)
         }
     except Exception as e:
         logger.error(f"Error adding documents: {str(e)}")
@@ -193,7 +329,8 @@ async def get_stats():
         raise HTTPException(status_code=503, detail="Vector store not initialized")
     
     try:
-        stats = vector_store.get_collection_stats()
+        # Counts the caches too (an HTTP call with a Chroma server), keep it off the event loop
+        stats = await asyncio.to_thread(vector_store.get_collection_stats)
         return {
             "vector_store": stats,
             "agent_config": {
@@ -201,7 +338,8 @@ async def get_stats():
                 "ollama_url": agent.ollama_url if agent else "unknown",
                 "max_tokens": agent.max_tokens if agent else 0,
                 "temperature": agent.temperature if agent else 0.0
-            }
+            },
+            "context_cache": agent.get_cache_stats() if agent else {}
         }
     except Exception as e:
         logger.error(f"Error getting stats: {str(e)}")
@@ -215,7 +353,7 @@ async def clear_documents():
         raise HTTPException(status_code=503, detail="Vector store not initialized")
     
     try:
-        vector_store.delete_collection()
+        await asyncio.to_thread(vector_store.delete_collection)
         logger.info("Vector store cleared")
         return {"status": "success", "message": "All documents cleared"}
     except Exception as e:
@@ -223,17 +361,49 @@ async def clear_documents():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def load_samples_if_empty(persist_dir: str = "./vector_store") -> None:
+    """Load the sample documents once if the vector store is empty"""
+    # Counting doesn't need the embedding model, so it is only loaded when seeding
+    if count_documents(persist_dir) > 0:
+        return
+    logger.info("Loading sample documents...")
+    load_sample_documents(get_chroma_tool(persist_dir=persist_dir))
+
+
 def main():
     """Run the MCP server"""
+    # Number of worker processes; each worker loads its own copy of the embedding model
+    workers = get_worker_count()
+    
+    # Embedded Chroma is not safe to share between processes
+    if workers > 1 and not CHROMA_SERVER_URL:
+        raise SystemExit(
+            "WEB_CONCURRENCY > 1 needs a shared Chroma server: run "
+            "'chroma run --path ./vector_store --port 8002' and set CHROMA_SERVER_URL=http://localhost:8002"
+        )
+    
     logger.info("Starting MCP-Powered Agentic RAG Server...")
     logger.info("Make sure Ollama is running at http://localhost:11434")
-    logger.info("Server will be available at http://localhost:8000")
+    logger.info(f"Server will be available at http://localhost:8000 ({workers} worker(s))")
+    
+    # Seed the store here, before any worker starts, so workers don't race to load samples
+    configure_performance_environment()
+    if workers > 1:
+        # Seed from a short-lived process so the supervisor doesn't keep a copy of the model
+        seeder = multiprocessing.get_context("spawn").Process(target=load_samples_if_empty)
+        seeder.start()
+        seeder.join()
+        if seeder.exitcode != 0:
+            raise SystemExit(f"Loading sample documents failed (exit code {seeder.exitcode}), see the log above")
+    else:
+        load_samples_if_empty()
     
     uvicorn.run(
-        app,
+        "main:app",
         host="0.0.0.0",
         port=8000,
-        log_level="info"
+        log_level="info",
+        workers=workers
     )
 
 
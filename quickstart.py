@@ -5,7 +5,6 @@ Demonstrates different ways to use the system
 """
 
 import sys
-import os
 from pathlib import Path
 
 
@@ -73,11 +72,22 @@ def show_menu():
     print("-"*50)
 
 
+# The launchers below run in this process instead of spawning a new interpreter,
+# so chromadb and the embedding model are imported and loaded only once per session.
+
 def start_chat():
     """Start interactive chat"""
     print("\n🚀 Starting Chat Interface...")
     print("Make sure Ollama is running!")
-    os.system("python rag_agent.py")
+    
+    from rag_agent import RAGAgent
+    from tools.chromadb_tool import load_sample_documents
+    
+    agent = RAGAgent()
+    if agent.vector_store.get_collection_stats()["document_count"] == 0:
+        print("Loading sample documents...")
+        load_sample_documents(agent.vector_store)
+    agent.chat_loop()
 
 
 def start_server():
@@ -85,7 +95,13 @@ def start_server():
     print("\n🚀 Starting FastAPI MCP Server...")
     print("Server will be available at: http://localhost:8000")
     print("Press Ctrl+C to stop\n")
-    os.system("python main.py")
+    
+    import uvicorn
+    from main import app, configure_performance_environment, load_samples_if_empty
+    
+    configure_performance_environment()
+    load_samples_if_empty()
+    uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=8000, log_level="info")).run()
 
 
 def start_streamlit():
@@ -93,16 +109,20 @@ def start_streamlit():
     print("\n🚀 Starting Streamlit Frontend...")
     print("Frontend will be available at: http://localhost:8501")
     print("Make sure the FastAPI server is running!")
-    os.system("streamlit run streamlit_app.py")
+    
+    from streamlit.web import bootstrap
+    
+    bootstrap.load_config_options(flag_options={})
+    bootstrap.run(str(Path(__file__).with_name("streamlit_app.py")), False, [], {})
 
 
 def test_vector_store():
     """Test vector store functionality"""
     print("\n🧪 Testing Vector Store...")
     try:
-        from tools.chromadb_tool import ChromaTool, load_sample_documents
+        from tools.chromadb_tool import get_chroma_tool, load_sample_documents
         
-        tool = ChromaTool(persist_dir="./vector_store")
+        tool = get_chroma_tool(persist_dir="./vector_store")
         
         # Check if documents exist
         stats = tool.get_collection_stats()
@@ -128,9 +148,9 @@ def load_documents():
     """Load sample documents"""
     print("\n📚 Loading Sample Documents...")
     try:
-        from tools.chromadb_tool import ChromaTool, load_sample_documents
+        from tools.chromadb_tool import get_chroma_tool, load_sample_documents
         
-        tool = ChromaTool(persist_dir="./vector_store")
+        tool = get_chroma_tool(persist_dir="./vector_store")
         load_sample_documents(tool)
         
         stats = tool.get_collection_stats()
@@ -171,6 +191,8 @@ def show_info():
         ("GET", "/", "API info"),
         ("GET", "/health", "Health check"),
         ("POST", "/query", "Query agent"),
+        ("POST", "/query/batch", "Query agent (batch)"),
+        ("POST", "/query/stream", "Query agent (streaming)"),
         ("POST", "/search", "Search documents"),
         ("POST", "/documents", "Add documents"),
         ("GET", "/stats", "System stats"),
@@ -3,11 +3,33 @@ RAG Agent Module
 Handles agent query logic, LLM interactions, and response generation
 """
 
+import io
 import os
 import json
-import requests
-from typing import Optional, Dict, Any
-from tools.chromadb_tool import ChromaTool
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+import httpx
+import orjson
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from tools.chromadb_tool import ChromaTool, get_chroma_tool, SEMANTIC_CACHE_THRESHOLD
+
+
+CONTEXT_CACHE_SIZE = 512
+
+# Static parts of the RAG prompt. Keep these byte-identical across requests so
+# Ollama can reuse the KV cache for the shared instruction prefix.
+_PROMPT_PREFIX = """You are a helpful AI assistant. Use the provided context to answer the user's question accurately and concisely.
+
+Context Information:
+"""
+_PROMPT_MID = """
+
+User Question: """
+_PROMPT_SUFFIX = """
+
+Please provide a clear and informative answer based on the context provided. If the context doesn't contain relevant information, say so and provide your best response based on your knowledge."""
 
 
 class RAGAgent:
@@ -19,7 +41,11 @@ class RAGAgent:
         model: str = "mistral",
         vector_store_path: str = "./vector_store",
         max_tokens: int = 1024,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        keep_alive: str = "30m",
+        vector_store: Optional[ChromaTool] = None,
+        context_cache_size: int = CONTEXT_CACHE_SIZE,
+        semantic_cache_threshold: Optional[float] = SEMANTIC_CACHE_THRESHOLD
     ):
         """
         Initialize the RAG Agent
@@ -30,58 +56,314 @@ class RAGAgent:
             vector_store_path: Path to the vector store
             max_tokens: Maximum tokens for LLM response
             temperature: Temperature for LLM sampling
+            keep_alive: How long Ollama keeps the model (and its prompt cache) loaded between requests
+            vector_store: Existing vector store to use instead of opening one at vector_store_path
+            context_cache_size: Maximum number of retrieved contexts kept in the LRU cache (0 disables it)
+            semantic_cache_threshold: Minimum similarity for reusing the answer to an earlier,
+                similar question (None disables the semantic cache)
         """
         self.ollama_url = ollama_url
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
+        self.keep_alive = keep_alive
+        self.semantic_cache_threshold = semantic_cache_threshold
+        
+        # Initialize vector store tool, reusing a shared instance when none is given
+        if vector_store is None:
+            vector_store = get_chroma_tool(persist_dir=vector_store_path)
+        self.vector_store = vector_store
         
-        # Initialize vector store tool
-        self.vector_store = ChromaTool(persist_dir=vector_store_path)
+        # LRU of (query + filter hash, n_results) -> (retrieved documents, formatted context).
+        # Retrieval runs in worker threads, so the cache is guarded by a threading lock.
+        # Entries belong to one vector store generation and are dropped once the documents change.
+        self.context_cache_size = context_cache_size
+        self._context_cache: "OrderedDict[Tuple[bytes, int], Tuple[List[str], str]]" = OrderedDict()
+        self._context_cache_lock = threading.Lock()
+        self._context_cache_generation = self.vector_store.generation
+        self._context_cache_hits = 0
+        self._context_cache_misses = 0
+        
+        # Shared async HTTP client so concurrent queries don't block each other.
+        # Keep-alive connections to Ollama are pooled and reused across requests.
+        self._client = httpx.AsyncClient(
+            base_url=ollama_url,
+            timeout=120,
+            # Payloads are pre-serialized with orjson and sent as content=
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client"""
+        await self._client.aclose()
     
-    def _call_ollama(self, prompt: str) -> str:
+    def _build_payload(self, prompt: str, stream: bool, num_predict: Optional[int] = None) -> Dict[str, Any]:
+        """Build the Ollama generate request body"""
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": self.temperature,
+                "num_predict": num_predict if num_predict is not None else self.max_tokens
+            }
+        }
+    
+    async def _call_ollama(self, prompt: str, num_predict: Optional[int] = None) -> str:
         """
         Call Ollama LLM with a prompt
         
         Args:
             prompt: The prompt to send to the LLM
+            num_predict: Maximum tokens to generate (defaults to max_tokens)
             
         Returns:
             Generated response from the LLM
         """
         try:
-            url = f"{self.ollama_url}/api/generate"
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "temperature": self.temperature,
-                "num_predict": self.max_tokens
-            }
+            payload = self._build_payload(prompt, stream=False, num_predict=num_predict)
             
-            response = requests.post(url, json=payload, timeout=120)
+            response = await self._client.post("/api/generate", content=orjson.dumps(payload))
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             return result.get("response", "").strip()
         
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             return "Error: Unable to connect to Ollama server. Make sure it's running."
         except Exception as e:
             return f"Error calling Ollama: {str(e)}"
     
-    def retrieve_context(self, query: str, n_results: int = 3) -> str:
+    async def _call_ollama_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Call Ollama LLM with a prompt and yield tokens as they are generated
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            
+        Yields:
+            Response fragments from the LLM
+            
+        Raises:
+            RuntimeError: If Ollama is unreachable, reports an error, or the
+                stream ends before the final "done" chunk
+        """
+        payload = self._build_payload(prompt, stream=True)
+        
+        try:
+            async with self._client.stream("POST", "/api/generate", content=orjson.dumps(payload)) as response:
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    # Ollama reports failures mid-stream as an in-band {"error": ...} line
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Error calling Ollama: {chunk['error']}")
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        return
+        
+        except httpx.ConnectError as e:
+            raise RuntimeError("Error: Unable to connect to Ollama server. Make sure it's running.") from e
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Error calling Ollama: {str(e) or type(e).__name__}") from e
+        
+        raise RuntimeError("Error calling Ollama: stream ended before the response was complete")
+    
+    async def warmup(self) -> None:
+        """
+        Load the embedding model and the Ollama model ahead of the first real query
+        
+        Runs one tiny search and a one-token generation so tokenizer setup,
+        first-inference overhead and the Ollama model load are paid at startup.
+        
+        Raises:
+            RuntimeError: If Ollama could not be reached or failed to generate
+        """
+        await asyncio.to_thread(self.vector_store.search, "warmup", 1)
+        response = await self._call_ollama("ping", num_predict=1)
+        # _call_ollama reports failures as "Error..." strings rather than raising
+        if response.startswith("Error"):
+            raise RuntimeError(response)
+    
+    @staticmethod
+    def _context_cache_key(query: str, n_results: int,
+                           where: Optional[Dict[str, Any]] = None) -> Tuple[bytes, int]:
+        """Build the context cache key for a query and metadata filter"""
+        digest = hashlib.blake2b(query.encode("utf-8"))
+        if where:
+            digest.update(b"\0" + json.dumps(where, sort_keys=True).encode("utf-8"))
+        return digest.digest(), n_results
+    
+    def _sync_context_cache(self) -> None:
+        """Drop cached contexts from an older vector store generation; call with the lock held"""
+        generation = self.vector_store.generation
+        if generation != self._context_cache_generation:
+            self._context_cache.clear()
+            self._context_cache_generation = generation
+    
+    def _context_cache_get(self, key: Tuple[bytes, int]) -> Optional[Tuple[List[str], str]]:
+        """Look up a cached context, counting the hit or miss"""
+        with self._context_cache_lock:
+            self._sync_context_cache()
+            entry = self._context_cache.get(key)
+            if entry is None:
+                self._context_cache_misses += 1
+                return None
+            self._context_cache.move_to_end(key)
+            self._context_cache_hits += 1
+            return entry
+    
+    def _context_cache_put(self, key: Tuple[bytes, int], entry: Tuple[List[str], str],
+                           generation: int) -> None:
+        """Store a context unless the documents changed while it was being retrieved"""
+        with self._context_cache_lock:
+            self._sync_context_cache()
+            if generation != self._context_cache_generation or self.context_cache_size <= 0:
+                return
+            self._context_cache[key] = entry
+            self._context_cache.move_to_end(key)
+            while len(self._context_cache) > self.context_cache_size:
+                self._context_cache.popitem(last=False)
+    
+    def _retrieve(self, query: str, n_results: int,
+                  where: Optional[Dict[str, Any]] = None) -> Tuple[List[str], str]:
+        """
+        Retrieve documents and formatted context for a query, using the context cache
+        
+        Args:
+            query: Search query
+            n_results: Number of documents to retrieve
+            where: Optional metadata filter applied before the vector search
+            
+        Returns:
+            Tuple of (retrieved documents, formatted context string)
+        """
+        key = self._context_cache_key(query, n_results, where)
+        entry = self._context_cache_get(key)
+        if entry is not None:
+            return entry
+        
+        generation = self.vector_store.generation
+        search_results, context = self.vector_store.search_with_formatting(query, n_results, where)
+        entry = (search_results["documents"], context)
+        self._context_cache_put(key, entry, generation)
+        return entry
+    
+    def _retrieve_many(self, queries: List[str], n_results: int,
+                       where: Optional[Dict[str, Any]] = None,
+                       query_embeddings: Optional[List[Any]] = None) -> List[Tuple[List[str], str]]:
+        """
+        Retrieve documents and formatted context for several queries, batching cache misses
+        
+        Args:
+            queries: List of search queries
+            n_results: Number of documents to retrieve per query
+            where: Optional metadata filter applied before the vector search
+            query_embeddings: Precomputed embeddings, one per query
+            
+        Returns:
+            List of (retrieved documents, formatted context string) tuples, one per query
+        """
+        keys = [self._context_cache_key(query, n_results, where) for query in queries]
+        entries = [self._context_cache_get(key) for key in keys]
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        
+        if missing:
+            generation = self.vector_store.generation
+            search_results = self.vector_store.search_many(
+                [queries[i] for i in missing], n_results, where,
+                None if query_embeddings is None else [query_embeddings[i] for i in missing]
+            )
+            for i, results in zip(missing, search_results):
+                entries[i] = (results["documents"], self.vector_store.format_results(results))
+                self._context_cache_put(keys[i], entries[i], generation)
+        
+        return entries
+    
+    def _semantic_cache_scope(self, use_context: bool, n_results: int,
+                              where: Optional[Dict[str, Any]] = None) -> str:
+        """Key for the generation settings a cached answer is only valid under"""
+        settings = json.dumps([self.model, use_context, n_results, where], sort_keys=True)
+        return hashlib.blake2b(settings.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def invalidate_context_cache(self) -> None:
+        """Drop all cached contexts; not needed after document changes, which are detected automatically"""
+        with self._context_cache_lock:
+            self._context_cache.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics for the context cache"""
+        with self._context_cache_lock:
+            lookups = self._context_cache_hits + self._context_cache_misses
+            return {
+                "hits": self._context_cache_hits,
+                "misses": self._context_cache_misses,
+                "hit_rate": self._context_cache_hits / lookups if lookups else 0.0,
+                "size": len(self._context_cache),
+                "max_size": self.context_cache_size
+            }
+    
+    def retrieve_context(self, query: str, n_results: int = 3,
+                         where: Optional[Dict[str, Any]] = None) -> str:
         """
         Retrieve relevant context from vector store
         
         Args:
             query: Search query
             n_results: Number of documents to retrieve
+            where: Optional metadata filter applied before the vector search
             
         Returns:
             Formatted context string
         """
-        return self.vector_store.search_formatted(query, n_results)
+        return self._retrieve(query, n_results, where)[1]
+    
+    def build_prompt_from_query(self, query: str, n_results: int = 3,
+                                where: Optional[Dict[str, Any]] = None,
+                                query_embedding: Optional[Any] = None) -> Tuple[str, List[str]]:
+        """
+        Retrieve context and build the LLM prompt in a single pass
+        
+        On a context cache miss the query is embedded and searched once and the
+        returned documents are written straight into the prompt buffer.
+        
+        Args:
+            query: User query
+            n_results: Number of context documents to retrieve
+            where: Optional metadata filter applied before the vector search
+            query_embedding: Precomputed query embedding, computed on a cache miss if omitted
+            
+        Returns:
+            Tuple of (prompt, retrieved documents)
+        """
+        key = self._context_cache_key(query, n_results, where)
+        entry = self._context_cache_get(key)
+        if entry is not None:
+            retrieved_docs, context = entry
+            return self.build_prompt(query, context), retrieved_docs
+        
+        generation = self.vector_store.generation
+        results = self.vector_store.search(
+            query, n_results, where, include=["documents", "metadatas"], query_embedding=query_embedding
+        )
+        
+        out = io.StringIO()
+        out.write(_PROMPT_PREFIX)
+        self.vector_store.write_results(results, out)
+        context_end = out.tell()
+        out.write(_PROMPT_MID)
+        out.write(query)
+        out.write(_PROMPT_SUFFIX)
+        prompt = out.getvalue()
+        
+        self._context_cache_put(key, (results["documents"], prompt[len(_PROMPT_PREFIX):context_end]), generation)
+        return prompt, results["documents"]
     
     def build_prompt(self, query: str, context: str) -> str:
         """
@@ -94,18 +376,77 @@ class RAGAgent:
         Returns:
             Final prompt for the LLM
         """
-        prompt = f"""You are a helpful AI assistant. Use the provided context to answer the user's question accurately and concisely.
-
-Context Information:
-{context}
-
-User Question: {query}
-
-Please provide a clear and informative answer based on the context provided. If the context doesn't contain relevant information, say so and provide your best response based on your knowledge."""
+        return _PROMPT_PREFIX + context + _PROMPT_MID + query + _PROMPT_SUFFIX
+    
+    async def _prepare_prompt(self, query: str, use_context: bool, n_results: int,
+                              where: Optional[Dict[str, Any]] = None,
+                              query_embedding: Optional[Any] = None) -> Tuple[str, List[str]]:
+        """
+        Retrieve context if requested and build the LLM prompt
         
-        return prompt
+        Args:
+            query: User query
+            use_context: Whether to use retrieved context
+            n_results: Number of context documents to retrieve
+            where: Optional metadata filter applied before the vector search
+            query_embedding: Precomputed query embedding
+            
+        Returns:
+            Tuple of (prompt, retrieved documents)
+        """
+        if not use_context:
+            return query, []
+        
+        # Retrieval is CPU-bound, keep it off the event loop
+        return await asyncio.to_thread(self.build_prompt_from_query, query, n_results, where, query_embedding)
     
-    def get_response(self, query: str, use_context: bool = True, n_results: int = 3) -> Dict[str, Any]:
+    async def _lookup_cached_answer(self, query: str, use_context: bool, n_results: int,
+                                    where: Optional[Dict[str, Any]] = None, use_cache: bool = True,
+                                    query_embedding: Optional[Any] = None
+                                    ) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[Any], int]:
+        """
+        Check the semantic cache for the answer to a similar earlier question
+        
+        Args:
+            query: User query
+            use_context: Whether to use retrieved context
+            n_results: Number of context documents to retrieve
+            where: Optional metadata filter applied before the vector search
+            use_cache: Whether this request may read and write the semantic cache
+            query_embedding: Precomputed query embedding, computed here if omitted
+            
+        Returns:
+            Tuple of (cache hit or None, cache scope, query embedding, cache generation);
+            scope and embedding are None when the semantic cache is not used
+        """
+        if not use_cache or self.semantic_cache_threshold is None:
+            return None, None, None, 0
+        
+        # Read before generating, so an answer based on documents that change meanwhile isn't stored
+        generation = self.vector_store.generation
+        
+        # Embed once; the cache lookup, retrieval and cache store all share it
+        if query_embedding is None:
+            query_embedding = await asyncio.to_thread(self.vector_store.embed_query, query)
+        scope = self._semantic_cache_scope(use_context, n_results, where)
+        hit = await asyncio.to_thread(
+            self.vector_store.cache_lookup, query, scope, self.semantic_cache_threshold,
+            query_embedding=query_embedding
+        )
+        return hit, scope, query_embedding, generation
+    
+    async def _store_answer(self, query: str, response: str, retrieved_docs: List[str],
+                            scope: Optional[str], query_embedding: Optional[Any], generation: int) -> None:
+        """Store a generated answer in the semantic cache, if it is used for this request"""
+        # _call_ollama reports failures as "Error..." strings; don't cache those
+        if scope is not None and not response.startswith("Error"):
+            await asyncio.to_thread(
+                self.vector_store.cache_store, query, response, retrieved_docs, scope,
+                query_embedding, generation
+            )
+    
+    async def get_response(self, query: str, use_context: bool = True, n_results: int = 3,
+                           where: Optional[Dict[str, Any]] = None, use_cache: bool = True) -> Dict[str, Any]:
         """
         Get a response for a user query using RAG
         
@@ -113,29 +454,163 @@ Please provide a clear and informative answer based on the context provided. If
             query: User query
             use_context: Whether to use retrieved context
             n_results: Number of context documents to retrieve
+            where: Optional metadata filter applied before the vector search
+            use_cache: Whether to reuse and store answers in the semantic cache
             
         Returns:
             Dict containing the response and metadata
         """
-        context = ""
-        retrieved_docs = []
-        
-        if use_context:
-            search_results = self.vector_store.search(query, n_results)
-            retrieved_docs = search_results["documents"]
-            context = self.vector_store.search_formatted(query, n_results)
+        hit, scope, query_embedding, generation = await self._lookup_cached_answer(
+            query, use_context, n_results, where, use_cache
+        )
+        if hit is not None:
+            return {
+                "query": query,
+                "response": hit["response"],
+                "retrieved_documents": hit["documents"],
+                "context_used": use_context,
+                "model": self.model,
+                "cached": True
+            }
         
-        # Build and send prompt to LLM
-        prompt = self.build_prompt(query, context) if use_context else query
-        response = self._call_ollama(prompt)
+        prompt, retrieved_docs = await self._prepare_prompt(query, use_context, n_results, where, query_embedding)
+        response = await self._call_ollama(prompt)
+        await self._store_answer(query, response, retrieved_docs, scope, query_embedding, generation)
         
         return {
             "query": query,
             "response": response,
             "retrieved_documents": retrieved_docs,
             "context_used": use_context,
-            "model": self.model
+            "model": self.model,
+            "cached": False
+        }
+    
+    async def stream_response(self, query: str, use_context: bool = True, n_results: int = 3,
+                              where: Optional[Dict[str, Any]] = None,
+                              use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response for a user query using RAG
+        
+        Args:
+            query: User query
+            use_context: Whether to use retrieved context
+            n_results: Number of context documents to retrieve
+            where: Optional metadata filter applied before the vector search
+            use_cache: Whether to reuse and store answers in the semantic cache
+            
+        Yields:
+            A "context" event with the retrieved documents, then one "token"
+            event per generated fragment, then a final "done" event
+            
+        Raises:
+            RuntimeError: If generation fails; nothing is cached in that case
+        """
+        hit, scope, query_embedding, generation = await self._lookup_cached_answer(
+            query, use_context, n_results, where, use_cache
+        )
+        if hit is not None:
+            yield {
+                "type": "context",
+                "query": query,
+                "retrieved_documents": hit["documents"],
+                "context_used": use_context,
+                "model": self.model,
+                "cached": True
+            }
+            yield {"type": "token", "content": hit["response"]}
+            yield {"type": "done"}
+            return
+        
+        prompt, retrieved_docs = await self._prepare_prompt(query, use_context, n_results, where, query_embedding)
+        
+        yield {
+            "type": "context",
+            "query": query,
+            "retrieved_documents": retrieved_docs,
+            "context_used": use_context,
+            "model": self.model,
+            "cached": False
         }
+        
+        tokens = []
+        async for token in self._call_ollama_stream(prompt):
+            tokens.append(token)
+            yield {"type": "token", "content": token}
+        
+        # Only reached once Ollama sent its final chunk; failed streams raise instead
+        await self._store_answer(query, "".join(tokens).strip(), retrieved_docs, scope, query_embedding, generation)
+        yield {"type": "done"}
+    
+    async def get_responses_batch(self, queries: List[str], use_context: bool = True, n_results: int = 3,
+                                  where: Optional[Dict[str, Any]] = None,
+                                  use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Get responses for several queries, batching retrieval and running generations concurrently
+        
+        Args:
+            queries: List of user queries
+            use_context: Whether to use retrieved context
+            n_results: Number of context documents to retrieve per query
+            where: Optional metadata filter applied to every query
+            use_cache: Whether to reuse and store answers in the semantic cache
+            
+        Returns:
+            List of response dicts, one per query, in the same format as get_response()
+        """
+        lookups = [(None, None, None, 0)] * len(queries)
+        if use_cache and self.semantic_cache_threshold is not None and queries:
+            # One embedding pass for all queries, shared by the cache lookups and stores
+            embeddings = await asyncio.to_thread(self.vector_store.embed_queries, queries)
+            lookups = await asyncio.gather(*[
+                self._lookup_cached_answer(query, use_context, n_results, where, query_embedding=embedding)
+                for query, embedding in zip(queries, embeddings)
+            ])
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        for i, (hit, _, _, _) in enumerate(lookups):
+            if hit is not None:
+                results[i] = {
+                    "query": queries[i],
+                    "response": hit["response"],
+                    "retrieved_documents": hit["documents"],
+                    "context_used": use_context,
+                    "model": self.model,
+                    "cached": True
+                }
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        pending_queries = [queries[i] for i in pending]
+        retrieved = [[] for _ in pending]
+        prompts = list(pending_queries)
+        
+        if use_context and pending_queries:
+            # Reuse the embeddings computed for the cache lookups, if any
+            pending_embeddings = None
+            if lookups[pending[0]][2] is not None:
+                pending_embeddings = [lookups[i][2] for i in pending]
+            entries = await asyncio.to_thread(
+                self._retrieve_many, pending_queries, n_results, where, pending_embeddings
+            )
+            for j, (query, (docs, context)) in enumerate(zip(pending_queries, entries)):
+                retrieved[j] = docs
+                prompts[j] = self.build_prompt(query, context)
+        
+        responses = await asyncio.gather(*[self._call_ollama(prompt) for prompt in prompts])
+        
+        for i, response, docs in zip(pending, responses, retrieved):
+            _, scope, query_embedding, generation = lookups[i]
+            await self._store_answer(queries[i], response, docs, scope, query_embedding, generation)
+            results[i] = {
+                "query": queries[i],
+                "response": response,
+                "retrieved_documents": docs,
+                "context_used": use_context,
+                "model": self.model,
+                "cached": False
+            }
+        
+        return results
     
     def chat_loop(self) -> None:
         """Run an interactive chat loop"""
@@ -146,6 +621,9 @@ Please provide a clear and informative answer based on the context provided. If
         print("Type 'reload' to reload documents")
         print("-" * 60)
         
+        # One event loop for the whole session so the HTTP client can reuse connections
+        loop = asyncio.new_event_loop()
+        
         while True:
             try:
                 user_input = input("\nYou: ").strip()
@@ -164,7 +642,7 @@ Please provide a clear and informative answer based on the context provided. If
                     continue
                 
                 # Get response
-                result = self.get_response(user_input)
+                result = loop.run_until_complete(self.get_response(user_input))
                 
                 print(f"\nAgent: {result['response']}")
                 
@@ -176,6 +654,9 @@ Please provide a clear and informative answer based on the context provided. If
                 break
             except Exception as e:
                 print(f"Error: {str(e)}")
+        
+        loop.run_until_complete(self.aclose())
+        loop.close()
 
 
 def get_rag_response(query: str, ollama_url: str = "http://localhost:11434") -> Dict[str, Any]:
@@ -189,8 +670,14 @@ def get_rag_response(query: str, ollama_url: str = "http://localhost:11434") ->
     Returns:
         Response dictionary
     """
-    agent = RAGAgent(ollama_url=ollama_url)
-    return agent.get_response(query)
+    async def _run() -> Dict[str, Any]:
+        agent = RAGAgent(ollama_url=ollama_url)
+        try:
+            return await agent.get_response(query)
+        finally:
+            await agent.aclose()
+    
+    return asyncio.run(_run())
 
 
 if __name__ == "__main__":
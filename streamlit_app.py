@@ -3,10 +3,15 @@ Streamlit Frontend for MCP-Powered Agentic RAG System
 Interactive web UI for querying the RAG agent
 """
 
+import uuid
+import asyncio
+import threading
+from collections import deque
+from itertools import islice
 import streamlit as st
-import requests
-import json
-from typing import Dict, Any
+import httpx
+import orjson
+from typing import Dict, Any, AsyncIterator, Awaitable, Iterator, Optional
 
 # Page configuration
 st.set_page_config(
@@ -53,80 +58,182 @@ api_url = st.sidebar.text_input(
 model_info = st.sidebar.empty()
 health_status = st.sidebar.empty()
 
+# Conversation history is capped, and only the latest page of it is rendered
+MAX_HISTORY_MESSAGES = 200
+HISTORY_PAGE_SIZE = 20
+
 # Initialize session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+# History is stored column-wise: parallel role and content sequences
+if "roles" not in st.session_state:
+    st.session_state.roles = deque(maxlen=MAX_HISTORY_MESSAGES)
+    st.session_state.contents = deque(maxlen=MAX_HISTORY_MESSAGES)
+if "history_limit" not in st.session_state:
+    st.session_state.history_limit = HISTORY_PAGE_SIZE
+if "last_result" not in st.session_state:
+    st.session_state.last_result = None
 if "doc_count" not in st.session_state:
     st.session_state.doc_count = 0
 
 # Functions
-def check_health() -> Dict[str, Any]:
+ADD_DOCUMENTS_CHUNK_SIZE = 32
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Event loop running in a background thread, shared by all sessions"""
+    # Streamlit reruns the script in a different thread each time, so coroutines are
+    # submitted to one long-lived loop that owns the pooled client connections
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+@st.cache_resource
+def get_client(base_url: str) -> httpx.AsyncClient:
+    """Shared async HTTP client for the API server, pooling keep-alive connections across reruns"""
+    # Request bodies are pre-serialized with orjson and sent as content=
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Content-Type": "application/json"},
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=16)
+    )
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """Run a coroutine on the shared event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+_STREAM_END = object()
+
+async def _next_item(agen: AsyncIterator[Any]) -> Any:
+    """Await the next item of an async iterator, or _STREAM_END when it is exhausted"""
+    try:
+        return await agen.__anext__()
+    except StopAsyncIteration:
+        return _STREAM_END
+
+def iter_async(agen: AsyncIterator[Any]) -> Iterator[Any]:
+    """Iterate an async generator from the script thread, one item at a time"""
+    try:
+        while True:
+            item = run_async(_next_item(agen))
+            if item is _STREAM_END:
+                return
+            yield item
+    finally:
+        # Release the HTTP stream if the script stops early, e.g. on a rerun
+        run_async(agen.aclose())
+
+async def check_health(base_url: str) -> Dict[str, Any]:
     """Check API health status"""
     try:
-        response = requests.get(f"{api_url}/health", timeout=5)
+        response = await get_client(base_url).get("/health", timeout=5)
         return response.json()
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-def query_agent(query: str, use_context: bool, n_results: int) -> Dict[str, Any]:
-    """Query the RAG agent"""
+async def stream_query(base_url: str, query: str, use_context: bool, n_results: int,
+                       use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """Query the RAG agent, yielding its server-sent events as they arrive"""
     try:
-        response = requests.post(
-            f"{api_url}/query",
-            json={
+        async with get_client(base_url).stream(
+            "POST",
+            "/query/stream",
+            content=orjson.dumps({
                 "query": query,
                 "use_context": use_context,
-                "n_results": n_results
-            },
+                "n_results": n_results,
+                "use_cache": use_cache
+            }),
             timeout=120
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.ConnectionError:
-        return {"error": "Cannot connect to API server. Is it running?"}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    yield orjson.loads(line[len("data: "):])
+    except httpx.ConnectError:
+        yield {"type": "error", "detail": "Cannot connect to API server. Is it running?"}
     except Exception as e:
-        return {"error": str(e)}
+        yield {"type": "error", "detail": str(e)}
 
-def get_stats() -> Dict[str, Any]:
+async def get_stats(base_url: str) -> Dict[str, Any]:
     """Get system statistics"""
     try:
-        response = requests.get(f"{api_url}/stats", timeout=5)
+        response = await get_client(base_url).get("/stats", timeout=5)
         return response.json()
     except Exception as e:
         return {"error": str(e)}
 
-def add_documents(documents: list, ids: list = None) -> Dict[str, Any]:
-    """Add documents to vector store"""
+# Health and stats are near-static, so cache them briefly instead of refetching on
+# every widget interaction; keyed on the URL so editing it in the sidebar refetches
+@st.cache_data(ttl=5, show_spinner=False)
+def cached_health(base_url: str) -> Dict[str, Any]:
+    """Health status, cached for a few seconds"""
+    return run_async(check_health(base_url))
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_stats(base_url: str) -> Dict[str, Any]:
+    """System statistics, cached for half a minute"""
+    return run_async(get_stats(base_url))
+
+def clear_status_cache() -> None:
+    """Drop cached health and stats, e.g. after the document collection changes"""
+    cached_health.clear()
+    cached_stats.clear()
+
+async def _post_documents(base_url: str, documents: list, ids: Optional[list]) -> Dict[str, Any]:
+    """Post one batch of documents to the vector store"""
     try:
-        response = requests.post(
-            f"{api_url}/documents",
-            json={
+        response = await get_client(base_url).post(
+            "/documents",
+            content=orjson.dumps({
                 "documents": documents,
                 "ids": ids
-            },
+            }),
             timeout=30
         )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except Exception as e:
         return {"error": str(e)}
 
+async def add_documents(base_url: str, documents: list, ids: list = None) -> Dict[str, Any]:
+    """Add documents to vector store, posting large lists in concurrent chunks"""
+    if len(documents) <= ADD_DOCUMENTS_CHUNK_SIZE:
+        return await _post_documents(base_url, documents, ids)
+    
+    # The server numbers documents without IDs from zero per request, so give
+    # each document a unique ID before splitting the list across requests
+    if not ids:
+        ids = [uuid.uuid4().hex for _ in documents]
+    
+    results = await asyncio.gather(*[
+        _post_documents(base_url, documents[i:i + ADD_DOCUMENTS_CHUNK_SIZE], ids[i:i + ADD_DOCUMENTS_CHUNK_SIZE])
+        for i in range(0, len(documents), ADD_DOCUMENTS_CHUNK_SIZE)
+    ])
+    
+    for result in results:
+        if "error" in result:
+            return result
+    return {
+        "status": "success",
+        "documents_added": sum(result.get("documents_added", 0) for result in results),
+        "total_documents": max(result.get("total_documents", 0) for result in results)
+    }
+
 # Header
 st.markdown('<div class="main-header">🤖 MCP-Powered Agentic RAG</div>', 
             unsafe_allow_html=True)
 st.markdown("Ask questions and get intelligent answers powered by RAG and LLMs")
 
-# Check API health
-health = check_health()
+# Check API health and fetch system stats
+health = cached_health(api_url)
+stats = cached_stats(api_url)
 if health.get("status") == "healthy":
     health_status.success(f"✅ API Healthy ({health.get('vector_store_documents', 0)} documents)")
     st.session_state.doc_count = health.get('vector_store_documents', 0)
 else:
     health_status.error(f"❌ API Error: {health.get('message', 'Unknown error')}")
 
-# Get system stats
+# Show system stats
 try:
-    stats = get_stats()
     if "vector_store" in stats:
         model_info.info(f"Model: {stats['agent_config'].get('model', 'unknown')}")
 except:
@@ -136,7 +243,10 @@ except:
 tab1, tab2, tab3 = st.tabs(["💬 Chat", "📚 Document Management", "📊 Statistics"])
 
 # Tab 1: Chat
-with tab1:
+# Runs as a fragment: its widgets rerun only this panel, not the sidebar and other tabs
+@st.fragment
+def chat_panel():
+    """Render the query form, the latest response and the conversation history"""
     st.subheader("Ask a Question")
     
     col1, col2 = st.columns([3, 1])
@@ -151,50 +261,82 @@ with tab1:
     with col2:
         use_context = st.checkbox("Use Context", value=True, help="Retrieve documents before generating response")
         n_results = st.slider("Context Documents", 1, 10, 3, help="Number of documents to retrieve")
+        use_cache = st.checkbox("Reuse Cached Answers", value=True,
+                                help="Answer from the semantic cache when a similar question was asked recently; untick to regenerate")
     
     # Submit button
     if st.button("🔍 Submit Query", type="primary", use_container_width=True):
         if not query.strip():
             st.warning("Please enter a question")
         else:
+            # Render tokens as they stream in; the full result is rendered below once done
+            result = {"query": query, "response": "", "retrieved_documents": [], "context_used": use_context}
+            stream_box = st.empty()
             with st.spinner("Generating response..."):
-                result = query_agent(query, use_context, n_results)
+                for event in iter_async(stream_query(api_url, query, use_context, n_results, use_cache)):
+                    if event["type"] == "context":
+                        result.update(event)
+                    elif event["type"] == "token":
+                        result["response"] += event["content"]
+                        stream_box.markdown(result["response"] + "▌")
+                    elif event["type"] == "error":
+                        result["error"] = event.get("detail", "Unknown error")
+                        break
+            stream_box.empty()
+            result.pop("type", None)
+            result["response"] = result["response"].strip()
             
             if "error" in result:
                 st.error(f"Error: {result['error']}")
             else:
-                # Display response
-                st.subheader("Response")
-                st.markdown('<div class="response-box">', unsafe_allow_html=True)
-                st.markdown(result.get("response", "No response"))
-                st.markdown('</div>', unsafe_allow_html=True)
+                # Keep the latest result in session state so it survives reruns,
+                # e.g. when another retrieved document is selected below
+                st.session_state.last_result = result
                 
                 # Store in conversation history
-                st.session_state.messages.append({
-                    "role": "user",
-                    "content": query
-                })
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": result.get("response", "")
-                })
-                
-                # Display context
-                if use_context and result.get("retrieved_documents"):
-                    st.subheader("📖 Retrieved Context")
-                    for i, doc in enumerate(result["retrieved_documents"], 1):
-                        with st.expander(f"Document {i}"):
-                            st.write(doc[:500] + "..." if len(doc) > 500 else doc)
+                st.session_state.roles.extend(("user", "assistant"))
+                st.session_state.contents.extend((query, result.get("response", "")))
+    
+    result = st.session_state.last_result
+    if result is not None:
+        # Display response
+        st.subheader("Response")
+        st.markdown('<div class="response-box">', unsafe_allow_html=True)
+        st.markdown(result.get("response", "No response"))
+        st.markdown('</div>', unsafe_allow_html=True)
+        if result.get("cached"):
+            st.caption("⚡ Answered from the semantic cache")
+        
+        # Display context, one selected document at a time
+        docs = result.get("retrieved_documents") or []
+        if result.get("context_used") and docs:
+            st.subheader("📖 Retrieved Context")
+            selected = st.selectbox("Document", range(1, len(docs) + 1), format_func=lambda i: f"Document {i}")
+            with st.expander(f"Document {selected}", expanded=True):
+                doc = docs[selected - 1]
+                st.write(doc[:500] + "..." if len(doc) > 500 else doc)
     
-    # Conversation history
-    if st.session_state.messages:
+    # Conversation history, most recent messages only
+    if st.session_state.roles:
         st.divider()
         st.subheader("📝 Conversation History")
-        for message in st.session_state.messages:
-            if message["role"] == "user":
-                st.write(f"**You:** {message['content']}")
+        
+        hidden = len(st.session_state.roles) - st.session_state.history_limit
+        if hidden > 0 and st.button(f"Show earlier… ({hidden} more)"):
+            st.session_state.history_limit += HISTORY_PAGE_SIZE
+            hidden -= HISTORY_PAGE_SIZE
+        
+        first = max(hidden, 0)
+        for role, content in zip(islice(st.session_state.roles, first, None),
+                                 islice(st.session_state.contents, first, None)):
+            if role == "user":
+                st.write(f"**You:** {content}")
             else:
-                st.write(f"**Agent:** {message['content']}")
+                st.write(f"**Agent:** {content}")
+
+
+with tab1:
+    chat_panel()
 
 
 # Tab 2: Document Management
@@ -218,9 +360,10 @@ with tab2:
             if st.button("Add Document"):
                 if doc_text.strip():
                     with st.spinner("Adding document..."):
-                        result = add_documents([doc_text])
+                        result = run_async(add_documents(api_url, [doc_text]))
                     
                     if "error" not in result:
+                        clear_status_cache()
                         st.success(f"✅ Added document! Total documents: {result.get('total_documents', 0)}")
                         st.session_state.doc_count = result.get('total_documents', 0)
                     else:
@@ -245,9 +388,10 @@ with tab2:
             if st.button("Add All Documents"):
                 if documents:
                     with st.spinner("Adding documents..."):
-                        result = add_documents(documents)
+                        result = run_async(add_documents(api_url, documents))
                     
                     if "error" not in result:
+                        clear_status_cache()
                         st.success(f"✅ Added {result.get('documents_added', 0)} documents!")
                         st.session_state.doc_count = result.get('total_documents', 0)
                     else:
@@ -257,7 +401,8 @@ with tab2:
     
     with management_tab2:
         if st.button("Refresh Statistics"):
-            stats = get_stats()
+            cached_stats.clear()
+            stats = cached_stats(api_url)
             if "vector_store" in stats:
                 st.info(f"**Collection:** {stats['vector_store']['collection_name']}")
                 st.info(f"**Total Documents:** {stats['vector_store']['document_count']}")
@@ -277,7 +422,6 @@ with tab3:
         st.metric("API Status", "✅ Active" if health.get("status") == "healthy" else "❌ Inactive")
     
     with col3:
-        stats = get_stats()
         if "agent_config" in stats:
             st.metric("Model", stats['agent_config'].get('model', 'Unknown'))
     
@@ -2,6 +2,7 @@
 Tools package for MCP-Powered Agentic RAG
 """
 
-from .chromadb_tool import ChromaTool, load_sample_documents
+from .chromadb_tool import ChromaTool, get_chroma_tool, load_sample_documents
+from .embed_cache import EmbeddingCache
 
-__all__ = ["ChromaTool", "load_sample_documents"]
+__all__ = ["ChromaTool", "get_chroma_tool", "load_sample_documents", "EmbeddingCache"]
@@ -3,47 +3,287 @@ ChromaDB Tool for RAG System
 Manages document storage, retrieval, and vector similarity search
 """
 
+import io
 import os
-import json
-from typing import Optional, List, Dict, Any
+import time
+import hashlib
+import threading
+from functools import lru_cache
+from urllib.parse import urlsplit
+from typing import Optional, List, Dict, Any, Tuple, TextIO
+import numpy as np
+import orjson
 import chromadb
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
 
+from .embed_cache import EmbeddingCache
+
+
+# Single source of truth for the embedding model, shared with the embedding server
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+# Base URL of a Chroma server (chroma run --path ./vector_store); empty opens the store
+# in-process. Required when several API worker processes share one store.
+CHROMA_SERVER_URL = os.environ.get("CHROMA_SERVER_URL", "")
+# Base URL of a shared embedding server (python -m tools.embed_server); empty embeds in-process
+EMBED_SERVER_URL = os.environ.get("EMBED_SERVER_URL", "")
+# On-disk query embedding cache shared by all stores; set EMBED_CACHE_PATH="" to disable
+EMBED_CACHE_PATH = os.environ.get("EMBED_CACHE_PATH", os.path.join("vector_store", "embed_cache.sqlite3"))
+# Documents per embedding pass / collection.add call when ingesting
+ADD_BATCH_SIZE = 1000
+# Texts per model forward pass inside an embedding call
+EMBED_BATCH_SIZE = 64
+# Inference runtime for the embedding model: "torch", or "onnx" / "openvino"
+# (sentence-transformers >= 3.2 with optimum installed)
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+# Model file for the onnx/openvino backends, e.g. the int8 export shipped with
+# all-MiniLM-L6-v2: "onnx/model_qint8_avx512_vnni.onnx"
+EMBEDDING_MODEL_FILE = os.environ.get("EMBEDDING_MODEL_FILE", "")
+
+# HNSW index settings applied when a collection is created. Higher construction_ef
+# and M build a better graph; search_ef trades query latency against recall.
+HNSW_CONFIG: Dict[str, Any] = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 100,
+    "hnsw:M": 16
+}
+
+# Cached embeddings of the sample documents, stored in the vector store directory
+SAMPLE_EMBEDDINGS_FILE = "sample_embeddings.npz"
+
+# Context formatting: separator under the header, and per-document content limit
+RESULTS_SEPARATOR = "-" * 50 + "\n"
+MAX_CONTENT_CHARS = 500
+
+# Semantic response cache: an earlier answer is reused when a new question embeds
+# within this cosine similarity of the cached one and the entry is younger than the TTL
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_TTL_SECONDS = 3600
+# Expired answers are deleted at most this often, and the oldest ones beyond the cap
+SEMANTIC_CACHE_PURGE_INTERVAL_SECONDS = 300
+SEMANTIC_CACHE_MAX_ENTRIES = 10000
+
+# Process-wide caches so the embedding model and Chroma clients are only loaded once
+_MODEL_CACHE: Dict[str, EmbeddingFunction] = {}
+_MODEL_LOCK = threading.Lock()
+_TOOL_CACHE: Dict[Tuple[str, str], "ChromaTool"] = {}
+_TOOL_LOCK = threading.Lock()
+_EMBED_CACHE: Optional[EmbeddingCache] = None
+_EMBED_CACHE_LOCK = threading.Lock()
+
+
+def _default_device() -> str:
+    """Pick the device for the embedding model"""
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+class BatchedSentenceTransformerEmbeddingFunction(SentenceTransformerEmbeddingFunction):
+    """SentenceTransformer embeddings encoded in large batches, with fp16 weights on GPU"""
+    
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, batch_size: int = EMBED_BATCH_SIZE,
+                 backend: str = EMBEDDING_BACKEND, model_file: str = EMBEDDING_MODEL_FILE):
+        """
+        Load the model
+        
+        Args:
+            model_name: SentenceTransformer model name
+            batch_size: Texts per forward pass
+            backend: "torch", "onnx" or "openvino"
+            model_file: Model file to load for the onnx/openvino backends
+        """
+        kwargs: Dict[str, Any] = {}
+        if backend != "torch":
+            # e.g. an int8-quantized ONNX export runs the matmuls on VNNI instructions
+            kwargs["backend"] = backend
+            if model_file:
+                kwargs["model_kwargs"] = {"file_name": model_file}
+        
+        super().__init__(model_name=model_name, device=_default_device(), **kwargs)
+        self.batch_size = batch_size
+        
+        # Half precision halves the memory traffic of the matmuls; CPU kernels gain nothing from it
+        if backend == "torch" and self._model.device.type == "cuda":
+            self._model.half()
+    
+    def __call__(self, input: Documents) -> Embeddings:
+        embeddings = self._model.encode(
+            list(input),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        # Plain lists: chromadb < 0.6 rejects numpy vectors from an embedding function
+        return np.asarray(embeddings, dtype=np.float32).tolist()
+
+
+def get_embedding_function(model_name: str = EMBEDDING_MODEL_NAME, local: bool = False) -> EmbeddingFunction:
+    """
+    Return the shared embedding function for a model, loading it on first use
+    
+    When EMBED_SERVER_URL is set, texts are sent to the shared embedding server
+    instead of loading the model in this process, unless local is True.
+    """
+    remote = bool(EMBED_SERVER_URL) and not local
+    key = f"{EMBED_SERVER_URL}#{model_name}" if remote else model_name
+    
+    embedding_func = _MODEL_CACHE.get(key)
+    if embedding_func is None:
+        with _MODEL_LOCK:
+            embedding_func = _MODEL_CACHE.get(key)
+            if embedding_func is None:
+                if remote:
+                    from .embed_server import RemoteEmbeddingFunction
+                    embedding_func = RemoteEmbeddingFunction(EMBED_SERVER_URL, model_name)
+                else:
+                    embedding_func = BatchedSentenceTransformerEmbeddingFunction(model_name=model_name)
+                _MODEL_CACHE[key] = embedding_func
+    return embedding_func
+
+
+def get_embed_cache() -> Optional[EmbeddingCache]:
+    """Return the shared on-disk embedding cache, opening it on first use"""
+    global _EMBED_CACHE
+    if _EMBED_CACHE is None and EMBED_CACHE_PATH:
+        with _EMBED_CACHE_LOCK:
+            if _EMBED_CACHE is None:
+                _EMBED_CACHE = EmbeddingCache(EMBED_CACHE_PATH)
+    return _EMBED_CACHE
+
+
+def _runtime_key(model_name: str) -> str:
+    """Identify the model and inference runtime that produce embeddings, for persistent caches"""
+    return "\0".join([model_name, EMBEDDING_BACKEND, EMBEDDING_MODEL_FILE])
+
+
+@lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+def _cached_embed(query: str, model_name: str = EMBEDDING_MODEL_NAME) -> np.ndarray:
+    """
+    Embed a single query string, memoized so repeated queries skip the encoder
+    
+    Embeddings are kept as read-only float32 arrays (~1.5 KB each for a
+    384-dim model) rather than tuples of Python floats (~12 KB each).
+    Misses fall back to the on-disk cache before running the encoder.
+    """
+    disk_cache = get_embed_cache()
+    # Keyed on the runtime too, so switching EMBEDDING_BACKEND doesn't serve the old vectors
+    cache_key = _runtime_key(model_name)
+    embedding = disk_cache.get(query, cache_key) if disk_cache else None
+    
+    if embedding is None:
+        embedding = np.asarray(get_embedding_function(model_name)([query])[0], dtype=np.float32)
+        if disk_cache:
+            disk_cache.put(query, cache_key, embedding)
+    
+    embedding.setflags(write=False)
+    return embedding
+
+
+def get_query_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss counters for the in-memory and on-disk query embedding caches"""
+    info = _cached_embed.cache_info()
+    disk_cache = get_embed_cache()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "disk": disk_cache.get_stats() if disk_cache else None
+    }
+
+
+def _as_lists(embeddings: Any) -> List[List[float]]:
+    """Convert embeddings to nested lists, the form every supported chromadb version accepts"""
+    return np.asarray(embeddings, dtype=np.float32).tolist()
+
+
+def open_chroma_client(persist_dir: str = "./vector_store") -> "chromadb.api.ClientAPI":
+    """
+    Open the Chroma client for a vector store
+    
+    Connects to the Chroma server at CHROMA_SERVER_URL when it is set, and
+    otherwise opens the store in persist_dir in this process.
+    """
+    if CHROMA_SERVER_URL:
+        url = urlsplit(CHROMA_SERVER_URL)
+        return chromadb.HttpClient(
+            host=url.hostname,
+            port=url.port or (443 if url.scheme == "https" else 8000),
+            ssl=url.scheme == "https"
+        )
+    
+    # Create persist directory if it doesn't exist
+    os.makedirs(persist_dir, exist_ok=True)
+    return chromadb.PersistentClient(path=persist_dir)
+
+
+def count_documents(persist_dir: str = "./vector_store", collection_name: str = "documents") -> int:
+    """Count the documents in a collection without loading the embedding model"""
+    try:
+        return open_chroma_client(persist_dir).get_collection(name=collection_name).count()
+    except Exception:
+        # The collection has not been created yet
+        return 0
+
 
 class ChromaTool:
     """Vector search tool using ChromaDB for RAG retrieval"""
     
-    def __init__(self, persist_dir: str = "./vector_store", collection_name: str = "documents"):
+    def __init__(self, persist_dir: str = "./vector_store", collection_name: str = "documents",
+                 hnsw_config: Optional[Dict[str, Any]] = None):
         """
         Initialize ChromaDB client and collection
         
         Args:
             persist_dir: Directory to persist vector store
             collection_name: Name of the collection to create
+            hnsw_config: Overrides for HNSW_CONFIG, e.g. {"hnsw:search_ef": 50}.
+                Only applied when the collection is first created.
         """
         self.persist_dir = persist_dir
         self.collection_name = collection_name
+        self.model_name = EMBEDDING_MODEL_NAME
         
-        # Create persist directory if it doesn't exist
-        os.makedirs(persist_dir, exist_ok=True)
-        
-        # Initialize ChromaDB client with persistence
-        self.client = chromadb.PersistentClient(path=persist_dir)
+        # Initialize ChromaDB client with persistence, or connect to the shared server
+        self.client = open_chroma_client(persist_dir)
         
         # Use SentenceTransformer for embeddings
-        self.embedding_func = SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        self.embedding_func = get_embedding_function(self.model_name)
+        
+        # Texts not re-embedded because they repeated within a batch
+        self.duplicates_skipped = 0
+        self.semantic_cache_hits = 0
+        self.semantic_cache_misses = 0
+        self._stats_lock = threading.Lock()
+        # Bumped whenever the documents change (together with clearing the semantic cache).
+        # Caches of results derived from the documents check it, so stale results aren't kept.
+        self.generation = 0
+        self._semantic_cache_lock = threading.Lock()
+        # Zero so the first store also removes entries left over from earlier runs
+        self._last_semantic_cache_purge = 0.0
         
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
             embedding_function=self.embedding_func,
+            metadata={**HNSW_CONFIG, **(hnsw_config or {})}
+        )
+        
+        # Companion collection of (question embedding -> generated answer) pairs
+        self.semantic_cache = self.client.get_or_create_collection(
+            name=f"{collection_name}_semantic_cache",
+            embedding_function=self.embedding_func,
             metadata={"hnsw:space": "cosine"}
         )
     
     def add_documents(self, documents: List[str], ids: Optional[List[str]] = None, 
-                      metadata: Optional[List[Dict[str, Any]]] = None) -> None:
+                      metadata: Optional[List[Dict[str, Any]]] = None,
+                      embeddings: Optional[np.ndarray] = None) -> None:
         """
         Add documents to the vector store
         
@@ -51,6 +291,7 @@ class ChromaTool:
             documents: List of document texts to add
             ids: Optional list of document IDs (auto-generated if not provided)
             metadata: Optional list of metadata dicts for each document
+            embeddings: Optional precomputed embeddings, one row per document
         """
         if not ids:
             ids = [f"doc_{i}" for i in range(len(documents))]
@@ -58,66 +299,299 @@ class ChromaTool:
         if not metadata:
             metadata = [{"source": "unknown"} for _ in documents]
         
-        self.collection.add(
-            documents=documents,
-            ids=ids,
-            metadatas=metadata
-        )
+        # Embed each sub-batch in a single pass and hand Chroma the vectors directly,
+        # keeping each write under Chroma's maximum batch size
+        for start in range(0, len(documents), ADD_BATCH_SIZE):
+            end = start + ADD_BATCH_SIZE
+            batch = documents[start:end]
+            self.collection.add(
+                documents=batch,
+                embeddings=_as_lists(self._embed_batch(batch) if embeddings is None else embeddings[start:end]),
+                ids=ids[start:end],
+                metadatas=metadata[start:end]
+            )
         print(f"Added {len(documents)} documents to collection")
+        
+        # Cached answers were generated from the old document set
+        self.clear_semantic_cache()
     
-    def search(self, query: str, n_results: int = 3) -> Dict[str, Any]:
+    def search(self, query: str, n_results: int = 3,
+               where: Optional[Dict[str, Any]] = None,
+               include: Optional[List[str]] = None,
+               query_embedding: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """
         Search for documents similar to the query
         
         Args:
             query: Search query string
             n_results: Number of results to return
+            where: Optional Chroma metadata filter applied before the vector search,
+                e.g. {"source": "sample"} or {"source": {"$in": ["a.txt", "b.txt"]}}
+            include: Fields Chroma should return (defaults to documents, metadatas and distances)
+            query_embedding: Precomputed embedding of the query, e.g. shared with a
+                semantic cache lookup; computed (and cached) from query when omitted
             
         Returns:
             Dict containing documents, ids, distances, and metadata
         """
+        if query_embedding is None:
+            query_embedding = _cached_embed(query, self.model_name)
+        
+        results = self.collection.query(
+            query_embeddings=_as_lists([query_embedding]),
+            n_results=n_results,
+            where=where,
+            include=include or ["documents", "metadatas", "distances"]
+        )
+        
+        return self._unpack_results(results, 0)
+    
+    def search_many(self, queries: List[str], n_results: int = 3,
+                    where: Optional[Dict[str, Any]] = None,
+                    query_embeddings: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Search for several queries with one batched embedding pass and one query call
+        
+        Args:
+            queries: List of search query strings
+            n_results: Number of results to return per query
+            where: Optional Chroma metadata filter applied to every query
+            query_embeddings: Precomputed embeddings, one row per query; computed
+                in one batched pass when omitted
+            
+        Returns:
+            List of result dicts, one per query, in the same format as search()
+        """
+        if not queries:
+            return []
+        
+        embeddings = self._embed_batch(queries) if query_embeddings is None else query_embeddings
         results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
+            query_embeddings=_as_lists(embeddings),
+            n_results=n_results,
+            where=where
         )
         
+        return [self._unpack_results(results, i) for i in range(len(queries))]
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a query once so it can be passed to search() and the semantic cache"""
+        return _cached_embed(query, self.model_name)
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed several queries in one pass, one row per query"""
+        return self._embed_batch(queries)
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts in one pass, embedding each distinct text only once
+        
+        Args:
+            texts: List of texts, possibly containing duplicates
+            
+        Returns:
+            float32 array with one embedding row per input text
+        """
+        unique = list(dict.fromkeys(texts))
+        embeddings = np.asarray(self.embedding_func(unique), dtype=np.float32)
+        if len(unique) == len(texts):
+            return embeddings
+        
+        with self._stats_lock:
+            self.duplicates_skipped += len(texts) - len(unique)
+        
+        row = {text: i for i, text in enumerate(unique)}
+        return embeddings[[row[text] for text in texts]]
+    
+    @staticmethod
+    def _unpack_results(results: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """Extract the results for one query from a Chroma query response"""
         return {
-            "documents": results["documents"][0] if results["documents"] else [],
-            "ids": results["ids"][0] if results["ids"] else [],
-            "distances": results["distances"][0] if results["distances"] else [],
-            "metadatas": results["metadatas"][0] if results["metadatas"] else []
+            "documents": results["documents"][index] if results["documents"] else [],
+            "ids": results["ids"][index] if results["ids"] else [],
+            "distances": results["distances"][index] if results["distances"] else [],
+            "metadatas": results["metadatas"][index] if results["metadatas"] else []
         }
     
-    def search_formatted(self, query: str, n_results: int = 3) -> str:
+    def search_formatted(self, query: str, n_results: int = 3,
+                         where: Optional[Dict[str, Any]] = None) -> str:
         """
         Search and return formatted results as a string
         
         Args:
             query: Search query string
             n_results: Number of results to return
+            where: Optional Chroma metadata filter applied before the vector search
             
         Returns:
             Formatted string with retrieved documents
         """
-        results = self.search(query, n_results)
+        return self.format_results(self.search(query, n_results, where))
+    
+    def search_with_formatting(self, query: str, n_results: int = 3,
+                               where: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], str]:
+        """
+        Search once and return both the raw results and the formatted string
         
+        Args:
+            query: Search query string
+            n_results: Number of results to return
+            where: Optional Chroma metadata filter applied before the vector search
+            
+        Returns:
+            Tuple of (results dict as returned by search(), formatted string)
+        """
+        results = self.search(query, n_results, where)
+        return results, self.format_results(results)
+    
+    @staticmethod
+    def format_results(results: Dict[str, Any]) -> str:
+        """
+        Format search results as a context string
+        
+        Args:
+            results: Results dict as returned by search()
+            
+        Returns:
+            Formatted string with retrieved documents
+        """
+        out = io.StringIO()
+        ChromaTool.write_results(results, out)
+        return out.getvalue()
+    
+    @staticmethod
+    def write_results(results: Dict[str, Any], out: TextIO) -> None:
+        """
+        Write search results as a context string directly into a text buffer
+        
+        Args:
+            results: Results dict as returned by search()
+            out: Buffer the formatted documents are written to
+        """
         if not results["documents"]:
-            return "No documents found matching the query."
+            out.write("No documents found matching the query.")
+            return
         
-        formatted = "Retrieved Documents:\n"
-        formatted += "-" * 50 + "\n"
+        out.write("Retrieved Documents:\n")
+        out.write(RESULTS_SEPARATOR)
         
-        for i, (doc, meta) in enumerate(zip(results["documents"], results["metadatas"]), 1):
-            formatted += f"\n[Document {i}]\n"
-            formatted += f"Content: {doc[:500]}...\n" if len(doc) > 500 else f"Content: {doc}\n"
+        metadatas = results["metadatas"] or [None] * len(results["documents"])
+        for i, (doc, meta) in enumerate(zip(results["documents"], metadatas), 1):
+            out.write(f"\n[Document {i}]\nContent: ")
+            if len(doc) > MAX_CONTENT_CHARS:
+                out.write(doc[:MAX_CONTENT_CHARS])
+                out.write("...\n")
+            else:
+                out.write(doc)
+                out.write("\n")
             if meta:
-                formatted += f"Source: {meta.get('source', 'Unknown')}\n"
+                out.write(f"Source: {meta.get('source', 'Unknown')}\n")
+    
+    def cache_lookup(self, query: str, scope: str = "", threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                     ttl: float = SEMANTIC_CACHE_TTL_SECONDS,
+                     query_embedding: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached answer to a semantically similar question
+        
+        Args:
+            query: User query
+            scope: Key for the settings the answer was generated with; only entries
+                stored under the same scope can match
+            threshold: Minimum cosine similarity between the two questions
+            ttl: Ignore entries stored more than this many seconds ago
+            query_embedding: Precomputed embedding of the query
+            
+        Returns:
+            Dict with the cached "response" and its retrieved "documents", or None on a miss
+        """
+        if query_embedding is None:
+            query_embedding = _cached_embed(query, self.model_name)
+        
+        results = self.semantic_cache.query(
+            query_embeddings=_as_lists([query_embedding]),
+            n_results=1,
+            where={"$and": [{"scope": scope}, {"ts": {"$gte": time.time() - ttl}}]},
+            include=["metadatas", "distances"]
+        )
+        
+        hit = None
+        if results["ids"] and results["ids"][0] and 1 - results["distances"][0][0] >= threshold:
+            meta = results["metadatas"][0][0]
+            hit = {"response": meta["response"], "documents": orjson.loads(meta["documents"])}
+        
+        with self._stats_lock:
+            if hit is None:
+                self.semantic_cache_misses += 1
+            else:
+                self.semantic_cache_hits += 1
+        return hit
+    
+    def cache_store(self, query: str, response: str, documents: Optional[List[str]] = None,
+                    scope: str = "", query_embedding: Optional[np.ndarray] = None,
+                    generation: Optional[int] = None) -> None:
+        """
+        Store a generated answer in the semantic cache
+        
+        Args:
+            query: User query
+            response: Generated answer
+            documents: Documents retrieved to generate the answer
+            scope: Key for the settings the answer was generated with
+            query_embedding: Precomputed embedding of the query
+            generation: Store generation read before the answer was generated;
+                the answer is dropped if the documents changed since
+        """
+        if query_embedding is None:
+            query_embedding = _cached_embed(query, self.model_name)
         
-        return formatted
+        key = hashlib.blake2b(f"{scope}\0{query}".encode("utf-8"), digest_size=16).hexdigest()
+        with self._semantic_cache_lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.semantic_cache.upsert(
+                ids=[key],
+                embeddings=_as_lists([query_embedding]),
+                documents=[query],
+                metadatas=[{
+                    "scope": scope,
+                    "response": response,
+                    "documents": orjson.dumps(documents or []).decode(),
+                    "ts": time.time()
+                }]
+            )
+        
+        if time.time() - self._last_semantic_cache_purge >= SEMANTIC_CACHE_PURGE_INTERVAL_SECONDS:
+            self.purge_semantic_cache()
+    
+    def purge_semantic_cache(self, ttl: float = SEMANTIC_CACHE_TTL_SECONDS,
+                             max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES) -> None:
+        """
+        Delete expired cached answers, then the oldest ones beyond max_entries
+        
+        Args:
+            ttl: Delete entries stored more than this many seconds ago
+            max_entries: Maximum number of entries kept
+        """
+        with self._semantic_cache_lock:
+            self._last_semantic_cache_purge = time.time()
+            self.semantic_cache.delete(where={"ts": {"$lt": self._last_semantic_cache_purge - ttl}})
+            
+            excess = self.semantic_cache.count() - max_entries
+            if excess > 0:
+                entries = self.semantic_cache.get(include=["metadatas"])
+                oldest = sorted(zip(entries["metadatas"], entries["ids"]), key=lambda entry: entry[0]["ts"])
+                self.semantic_cache.delete(ids=[entry_id for _, entry_id in oldest[:excess]])
+    
+    def clear_semantic_cache(self) -> None:
+        """Drop all cached answers and start a new store generation"""
+        with self._semantic_cache_lock:
+            self.generation += 1
+            self.semantic_cache.delete(where={"ts": {"$gte": 0}})
     
     def delete_collection(self) -> None:
         """Delete the current collection"""
         self.client.delete_collection(name=self.collection_name)
+        self.clear_semantic_cache()
         print(f"Deleted collection: {self.collection_name}")
     
     def get_collection_stats(self) -> Dict[str, Any]:
@@ -126,10 +600,39 @@ class ChromaTool:
         return {
             "collection_name": self.collection_name,
             "document_count": count,
-            "persist_dir": self.persist_dir
+            "persist_dir": self.persist_dir,
+            "query_embedding_cache": get_query_cache_stats(),
+            "duplicates_skipped": self.duplicates_skipped,
+            "semantic_cache": {
+                "hits": self.semantic_cache_hits,
+                "misses": self.semantic_cache_misses,
+                "size": self.semantic_cache.count()
+            }
         }
 
 
+def get_chroma_tool(persist_dir: str = "./vector_store", collection_name: str = "documents") -> ChromaTool:
+    """
+    Get a shared ChromaTool for a persist directory and collection, creating it on first use
+    
+    Args:
+        persist_dir: Directory to persist vector store
+        collection_name: Name of the collection
+        
+    Returns:
+        The cached ChromaTool instance
+    """
+    key = (os.path.abspath(persist_dir), collection_name)
+    tool = _TOOL_CACHE.get(key)
+    if tool is None:
+        with _TOOL_LOCK:
+            tool = _TOOL_CACHE.get(key)
+            if tool is None:
+                tool = ChromaTool(persist_dir=persist_dir, collection_name=collection_name)
+                _TOOL_CACHE[key] = tool
+    return tool
+
+
 # Example usage and test functions
 def load_sample_documents(tool: ChromaTool) -> None:
     """Load sample documents for testing"""
@@ -144,12 +647,32 @@ def load_sample_documents(tool: ChromaTool) -> None:
     ids = [f"sample_doc_{i}" for i in range(len(sample_docs))]
     metadata = [{"source": "sample", "type": "general_info"} for _ in sample_docs]
     
-    tool.add_documents(sample_docs, ids, metadata)
+    if len(tool.collection.get(ids=ids, include=[])["ids"]) == len(ids):
+        print("Sample documents already loaded")
+        return
+    
+    # Reuse embeddings from an earlier run unless the documents or the model changed
+    cache_path = os.path.join(tool.persist_dir, SAMPLE_EMBEDDINGS_FILE)
+    fingerprint = hashlib.blake2b(
+        "\0".join([_runtime_key(tool.model_name), *sample_docs]).encode("utf-8")
+    ).hexdigest()
+    
+    embeddings = None
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as data:
+            if str(data["fingerprint"]) == fingerprint:
+                embeddings = data["embeddings"]
+    
+    if embeddings is None:
+        embeddings = tool._embed_batch(sample_docs)
+        np.savez_compressed(cache_path, embeddings=embeddings, fingerprint=fingerprint)
+    
+    tool.add_documents(sample_docs, ids, metadata, embeddings=embeddings)
 
 
 if __name__ == "__main__":
     # Test the ChromaTool
-    tool = ChromaTool(persist_dir="./vector_store")
+    tool = get_chroma_tool(persist_dir="./vector_store")
     
     # Load sample documents
     load_sample_documents(tool)
@@ -161,4 +684,4 @@ if __name__ == "__main__":
     
     # Print stats
     stats = tool.get_collection_stats()
-    print(f"\nCollection Stats: {json.dumps(stats, indent=2)}")
+    print(f"\nCollection Stats: {orjson.dumps(stats, option=orjson.OPT_INDENT_2).decode()}")
@@ -0,0 +1,93 @@
+"""
+Persistent Embedding Cache
+Stores text embeddings in SQLite so they survive server restarts
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Dict
+import numpy as np
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of text embeddings keyed on a BLAKE2b hash of the text"""
+    
+    def __init__(self, path: str):
+        """
+        Open (or create) the cache database
+        
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        
+        # Shared across worker threads, so serialize access with a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS emb_cache (hash BLOB PRIMARY KEY, vec BLOB)"
+            )
+            self._conn.commit()
+    
+    @staticmethod
+    def _key(text: str, model_name: str) -> bytes:
+        """Hash a text together with the model that embeds it"""
+        return hashlib.blake2b(f"{model_name}\0{text}".encode("utf-8")).digest()
+    
+    def get(self, text: str, model_name: str) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding
+        
+        Args:
+            text: The embedded text
+            model_name: Embedding model name, including the runtime that runs it
+        
+        Returns:
+            float32 embedding, or None if the text is not cached
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vec FROM emb_cache WHERE hash = ?", (self._key(text, model_name),)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        
+        return np.frombuffer(row[0], dtype=np.float16).astype(np.float32)
+    
+    def put(self, text: str, model_name: str, embedding: np.ndarray) -> None:
+        """
+        Store an embedding; vectors are kept as float16 to halve their size on disk
+        
+        Args:
+            text: The embedded text
+            model_name: Embedding model name, including the runtime that runs it
+            embedding: The embedding vector
+        """
+        vec = np.asarray(embedding, dtype=np.float16).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO emb_cache (hash, vec) VALUES (?, ?)",
+                (self._key(text, model_name), vec)
+            )
+            self._conn.commit()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the number of stored embeddings"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM emb_cache").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "size": count}
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
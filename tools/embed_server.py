@@ -0,0 +1,183 @@
+"""
+Embedding Server for RAG System
+Runs the embedding model in a single process shared by all API workers
+"""
+
+import os
+import asyncio
+import logging
+from typing import List, Tuple, Optional
+import numpy as np
+import httpx
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+import uvicorn
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+
+logger = logging.getLogger(__name__)
+
+# Requests arriving within this window are embedded together in one forward pass
+BATCH_WINDOW_SECONDS = 0.005
+MAX_BATCH_TEXTS = 256
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+    # Model the caller expects; rejected if the server runs a different one
+    model: Optional[str] = None
+
+
+class EmbedResponse(BaseModel):
+    vectors: List[List[float]]
+
+
+class MicroBatcher:
+    """Coalesces concurrent embedding requests into shared model calls"""
+    
+    def __init__(self, embedding_func, window: float = BATCH_WINDOW_SECONDS,
+                 max_batch: int = MAX_BATCH_TEXTS):
+        """
+        Initialize the batcher
+        
+        Args:
+            embedding_func: Callable mapping a list of texts to a list of vectors
+            window: Seconds to wait for more requests after the first one arrives
+            max_batch: Stop collecting once a batch holds this many texts
+        """
+        self.embedding_func = embedding_func
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: "asyncio.Queue[Tuple[List[str], asyncio.Future]]" = asyncio.Queue()
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Queue texts for the next batch and wait for their vectors"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+    
+    async def run(self) -> None:
+        """Collect queued requests into batches and embed them until cancelled"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            count = len(batch[0][0])
+            deadline = loop.time() + self.window
+            
+            while count < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                count += len(item[0])
+            
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = await asyncio.to_thread(self.embedding_func, texts)
+                vectors = np.asarray(vectors, dtype=np.float32).tolist()
+            except Exception as e:
+                logger.error(f"Error embedding batch: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            start = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[start:start + len(item_texts)])
+                start += len(item_texts)
+
+
+class RemoteEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Chroma embedding function that calls a shared embedding server over HTTP"""
+    
+    def __init__(self, url: str, model_name: str, timeout: float = 60):
+        """
+        Initialize the client
+        
+        Args:
+            url: Base URL of the embedding server, e.g. http://127.0.0.1:8001
+            model_name: Embedding model the server must be running
+            timeout: Request timeout in seconds
+        """
+        self.url = url
+        self.model_name = model_name
+        self._client = httpx.Client(base_url=url, timeout=timeout)
+    
+    def __call__(self, input: Documents) -> Embeddings:
+        response = self._client.post("/embed", json={"texts": list(input), "model": self.model_name})
+        response.raise_for_status()
+        return response.json()["vectors"]
+
+
+app = FastAPI(
+    title="RAG Embedding Server",
+    description="Shared embedding model for MCP-Powered Agentic RAG workers",
+    version="1.0.0"
+)
+
+batcher: Optional[MicroBatcher] = None
+batcher_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Load the embedding model and start the batching loop"""
+    global batcher, batcher_task
+    
+    # Imported here to avoid a circular import; chromadb_tool imports this module lazily
+    from .chromadb_tool import EMBEDDING_MODEL_NAME, get_embedding_function
+    
+    logger.info(f"Loading embedding model {EMBEDDING_MODEL_NAME}...")
+    batcher = MicroBatcher(get_embedding_function(EMBEDDING_MODEL_NAME, local=True))
+    batcher_task = asyncio.create_task(batcher.run())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the batching loop"""
+    if batcher_task is not None:
+        batcher_task.cancel()
+
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed(request: EmbedRequest):
+    """
+    Embed a list of texts
+    
+    Args:
+        request: EmbedRequest with texts
+    
+    Returns:
+        EmbedResponse with one vector per text, in order
+    """
+    from .chromadb_tool import EMBEDDING_MODEL_NAME
+    
+    # Vectors from different models can't share a collection or cache
+    if request.model is not None and request.model != EMBEDDING_MODEL_NAME:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Embedding server runs {EMBEDDING_MODEL_NAME}, not {request.model}"
+        )
+    return EmbedResponse(vectors=await batcher.embed(request.texts))
+
+
+def main():
+    """Run the embedding server"""
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run(
+        app,
+        host=os.environ.get("EMBED_SERVER_HOST", "127.0.0.1"),
+        port=int(os.environ.get("EMBED_SERVER_PORT", 8001)),
+        log_level="info"
+    )
+
+
+if __name__ == "__main__":
+    main()